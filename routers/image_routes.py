@@ -1,10 +1,15 @@
 """
 FastAPI router for image to Base64 conversion endpoints.
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
-from fastapi.responses import JSONResponse
+import os
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, Depends, Request, Response, UploadFile, File, HTTPException, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from services.image_service import ImageService
+from utils.file_utils import compute_base64_digest
 from schemas.base64_schema import (
     Base64DecodeRequest,
     Base64EncodeResponse,
@@ -15,8 +20,47 @@ from schemas.base64_schema import (
 # Initialize router
 router = APIRouter(prefix="/api/v1", tags=["image-conversion"])
 
-# Initialize service
-image_service = ImageService()
+# Shared service, created on first use
+_image_service: Optional[ImageService] = None
+
+
+async def get_image_service() -> ImageService:
+    """
+    Provide the shared ImageService instance.
+    
+    Declared async so FastAPI resolves it on the event loop
+    instead of dispatching it to the threadpool.
+    
+    Returns:
+        ImageService instance shared by all requests
+    """
+    global _image_service
+    if _image_service is None:
+        _image_service = ImageService()
+    return _image_service
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check whether an If-None-Match header value matches an ETag.
+    
+    Args:
+        if_none_match: Value of the If-None-Match header, if sent
+        etag: Quoted entity tag of the current payload
+        
+    The "*" wildcard is deliberately not honoured: a 304 is only valid
+    for a payload this server has actually saved.
+    
+    Returns:
+        True if the header lists the ETag
+    """
+    if not if_none_match:
+        return False
+    
+    for candidate in if_none_match.split(','):
+        if candidate.strip().removeprefix('W/') == etag:
+            return True
+    return False
 
 
 @router.post(
@@ -32,13 +76,15 @@ image_service = ImageService()
     description="Upload an image file and convert it to a Base64 encoded string."
 )
 async def encode_image_to_base64(
-    file: UploadFile = File(..., description="Image file to encode (JPG, PNG, GIF, BMP, TIFF)")
+    file: UploadFile = File(..., description="Image file to encode (JPG, PNG, GIF, BMP, TIFF)"),
+    image_service: ImageService = Depends(get_image_service)
 ) -> Base64EncodeResponse:
     """
     Encode an uploaded image file to Base64 string.
     
     Args:
         file: Image file uploaded via multipart/form-data
+        image_service: Shared image service
         
     Returns:
         Base64EncodeResponse with the encoded string and metadata
@@ -54,19 +100,23 @@ async def encode_image_to_base64(
                 detail="No file uploaded"
             )
         
-        # Check file size (limit to 10MB)
+        # Check file size (limit to 10MB) before reading any of the upload;
+        # the multipart parser has already spooled it and recorded its size
         max_size = 10 * 1024 * 1024  # 10MB
-        file_content = await file.read()
+        file_size = file.size
+        if file_size is None:
+            file_size = file.file.seek(0, os.SEEK_END)
+            file.file.seek(0)
         
-        if len(file_content) > max_size:
+        if file_size > max_size:
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 detail=f"File too large. Maximum size is {max_size / (1024*1024)}MB"
             )
         
-        # Process the image
-        success, error_message, result_data = image_service.encode_image_to_base64(
-            file_content, file.filename
+        # Validate the image in the threadpool to keep the event loop free
+        success, error_message, json_chunks = await anyio.to_thread.run_sync(
+            image_service.stream_image_to_base64, file.file, file.filename, file_size
         )
         
         if not success:
@@ -75,7 +125,9 @@ async def encode_image_to_base64(
                 detail=error_message
             )
         
-        return Base64EncodeResponse(**result_data)
+        # Stream the JSON body; the Base64 string is encoded chunk by chunk
+        # and never built in full, nor re-validated against the response model
+        return StreamingResponse(json_chunks, media_type="application/json")
         
     except HTTPException:
         raise
@@ -91,6 +143,7 @@ async def encode_image_to_base64(
     response_model=Base64DecodeResponse,
     status_code=status.HTTP_200_OK,
     responses={
+        304: {"description": "Payload matches the ETag sent in If-None-Match and is already saved"},
         400: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
     },
@@ -98,13 +151,24 @@ async def encode_image_to_base64(
     description="Convert a Base64 encoded string back to an image file and save it."
 )
 async def decode_base64_to_image(
-    request: Base64DecodeRequest
+    request: Base64DecodeRequest,
+    http_request: Request,
+    response: Response,
+    image_service: ImageService = Depends(get_image_service)
 ) -> Base64DecodeResponse:
     """
     Decode a Base64 string to an image file and save it.
     
+    The response carries an ETag derived from the Base64 payload. If the
+    client sends that ETag in If-None-Match and this server still holds a
+    saved file for the same payload and filename, 304 Not Modified is
+    returned without decoding or saving anything.
+    
     Args:
         request: Base64DecodeRequest containing the Base64 string and optional filename
+        http_request: Incoming HTTP request, used for its headers
+        response: Response whose headers receive the ETag
+        image_service: Shared image service
         
     Returns:
         Base64DecodeResponse with file path and success message
@@ -113,9 +177,19 @@ async def decode_base64_to_image(
         HTTPException: If Base64 string is invalid or processing fails
     """
     try:
+        # Skip the work entirely if the client already has this payload
+        # and its decoded file is still saved here
+        digest = await anyio.to_thread.run_sync(compute_base64_digest, request.base64_string)
+        etag = f'"{digest}"'
+        if (
+            _etag_matches(http_request.headers.get("if-none-match"), etag)
+            and image_service.get_cached_result(digest, request.filename) is not None
+        ):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
         # Process the Base64 string
-        success, error_message, result_data = image_service.decode_base64_to_image(
-            request.base64_string, request.filename
+        success, error_message, result_data = await image_service.decode_base64_to_image(
+            request.base64_string, digest, request.filename
         )
         
         if not success:
@@ -124,6 +198,7 @@ async def decode_base64_to_image(
                 detail=error_message
             )
         
+        response.headers["ETag"] = etag
         return Base64DecodeResponse(**result_data)
         
     except HTTPException:
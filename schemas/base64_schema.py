@@ -1,31 +1,37 @@
 """
 Pydantic models for Base64 image conversion API.
 """
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, Optional
 
 
 class Base64DecodeRequest(BaseModel):
     """Request model for decoding Base64 string to image."""
-    base64_string: str = Field(..., description="Base64 encoded image string")
-    filename: Optional[str] = Field(None, description="Optional filename for the decoded image")
+    base64_string: Annotated[str, Field(description="Base64 encoded image string")]
+    filename: Annotated[Optional[str], Field(description="Optional filename for the decoded image")] = None
 
 
 class Base64EncodeResponse(BaseModel):
     """Response model for image to Base64 encoding."""
-    base64_string: str = Field(..., description="Base64 encoded image string")
-    original_filename: str = Field(..., description="Original filename of the uploaded image")
-    file_size: int = Field(..., description="Size of the original image in bytes")
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
+    base64_string: Annotated[str, Field(description="Base64 encoded image string")]
+    original_filename: Annotated[str, Field(description="Original filename of the uploaded image")]
+    file_size: Annotated[int, Field(description="Size of the original image in bytes")]
 
 
 class Base64DecodeResponse(BaseModel):
     """Response model for Base64 to image decoding."""
-    message: str = Field(..., description="Success message")
-    file_path: str = Field(..., description="Path where the decoded image was saved")
-    filename: str = Field(..., description="Name of the saved image file")
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
+    message: Annotated[str, Field(description="Success message")]
+    file_path: Annotated[str, Field(description="Path where the decoded image was saved")]
+    filename: Annotated[str, Field(description="Name of the saved image file")]
 
 
 class ErrorResponse(BaseModel):
     """Error response model."""
-    error: str = Field(..., description="Error message")
-    detail: Optional[str] = Field(None, description="Additional error details") 
\ No newline at end of file
+    model_config = ConfigDict(frozen=True, extra='ignore')
+    
+    error: Annotated[str, Field(description="Error message")]
+    detail: Annotated[Optional[str], Field(description="Additional error details")] = None
\ No newline at end of file
@@ -1,89 +1,163 @@
 """
 Image processing service for Base64 conversion operations.
 """
-import base64
+import pybase64 as base64
 import os
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import BinaryIO, Iterator, Tuple, Optional
 from PIL import Image
 import io
+import threading
+from collections import OrderedDict
+import anyio
+import orjson
 
 from utils.file_utils import (
-    create_directories,
     validate_image_file,
-    validate_base64_string,
     generate_unique_filename,
     sanitize_filename
 )
 
+# File extensions for the PIL image formats that can be saved
+FORMAT_TO_EXTENSION = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'BMP': '.bmp',
+    'TIFF': '.tiff',
+    'WEBP': '.webp'
+}
+
+# Bytes read per step when streaming Base64 output (a multiple of 3,
+# so each chunk encodes without padding)
+BASE64_CHUNK_SIZE = 48 * 1024
+
+# Maximum number of decoded images remembered by content hash
+DECODE_CACHE_MAX_ENTRIES = 256
+
 
 class ImageService:
     """Service class for image to Base64 conversion operations."""
     
     def __init__(self):
-        """Initialize the service and create necessary directories."""
-        create_directories()
+        """Initialize the service; directories are created at app startup."""
         self.uploads_dir = Path("uploads")
         # Output directory within the project
         self.outputs_dir = Path("outputs")
+        self._outputs_dir_str = str(self.outputs_dir)
         
-        # Ensure the output directory exists
-        self.outputs_dir.mkdir(parents=True, exist_ok=True)
+        # LRU cache of decode results keyed by (payload hash, filename)
+        self._decode_cache = OrderedDict()
+        self._decode_cache_lock = threading.Lock()
     
-    def encode_image_to_base64(self, file_content: bytes, filename: str) -> Tuple[bool, Optional[str], Optional[dict]]:
+    def stream_image_to_base64(self, file: BinaryIO, filename: str, file_size: int) -> Tuple[bool, Optional[str], Optional[Iterator[bytes]]]:
         """
-        Encode an image file to Base64 string.
+        Encode an image file to a Base64 JSON document, chunk by chunk.
+        
+        The file is validated from its first chunk; the returned iterator
+        then yields the JSON body of a Base64EncodeResponse without ever
+        holding the whole Base64 string in memory.
+        
+        The iterator reads from its own duplicate of the file's descriptor
+        and closes it when done, so it stays valid after the caller closes
+        ``file`` (e.g. an upload closed before the response is streamed).
         
         Args:
-            file_content: Raw file content
+            file: Binary file object backed by a real file descriptor, read
+                from its start; SpooledTemporaryFile uploads are rolled over
+                to disk when their descriptor is requested
             filename: Original filename
+            file_size: Size of the image in bytes
             
         Returns:
-            Tuple of (success, error_message, result_data)
+            Tuple of (success, error_message, json_chunks)
         """
+        handle = None
         try:
-            # Validate the uploaded file
-            is_valid, error_message = validate_image_file(file_content, filename)
+            # Open a private handle on the same file for the iterator to own
+            handle = os.fdopen(os.dup(file.fileno()), 'rb')
+            handle.seek(0)
+            
+            # Validate the uploaded file from its header
+            header = handle.read(BASE64_CHUNK_SIZE)
+            is_valid, error_message = validate_image_file(header, filename)
             if not is_valid:
+                handle.close()
                 return False, error_message, None
             
-            # Encode to Base64
-            base64_string = base64.b64encode(file_content).decode('utf-8')
-            
-            # Prepare response data
-            result_data = {
-                "base64_string": base64_string,
-                "original_filename": filename,
-                "file_size": len(file_content)
-            }
-            
-            return True, None, result_data
+            return True, None, self._iter_base64_json(handle, header, filename, file_size)
             
         except Exception as e:
+            if handle is not None:
+                handle.close()
             return False, f"Error encoding image to Base64: {str(e)}", None
     
-    def decode_base64_to_image(self, base64_string: str, filename: Optional[str] = None) -> Tuple[bool, Optional[str], Optional[dict]]:
+    @staticmethod
+    def _iter_base64_json(file: BinaryIO, header: bytes, filename: str, file_size: int) -> Iterator[bytes]:
+        """
+        Yield the JSON encoding of a Base64EncodeResponse for a file.
+        
+        Base64 output never contains characters that need JSON escaping,
+        so it is emitted between the quotes as is. The file is closed once
+        the iterator finishes or is discarded.
+        
+        Args:
+            file: Binary file object positioned after the header, owned by
+                the iterator
+            header: First chunk already read from the file
+            filename: Original filename
+            file_size: Size of the image in bytes
+            
+        Yields:
+            Chunks of the JSON document
+        """
+        with file:
+            yield b'{"base64_string":"'
+            
+            pending = header
+            while chunk := file.read(BASE64_CHUNK_SIZE):
+                data = pending + chunk
+                aligned = len(data) - len(data) % 3
+                yield base64.b64encode(memoryview(data)[:aligned])
+                pending = data[aligned:]
+            if pending:
+                yield base64.b64encode(pending)
+            
+            # Close the string and append the remaining fields
+            yield b'",' + orjson.dumps({
+                "original_filename": filename,
+                "file_size": file_size
+            })[1:]
+    
+    async def decode_base64_to_image(self, base64_string: str, digest: str, filename: Optional[str] = None) -> Tuple[bool, Optional[str], Optional[dict]]:
         """
         Decode a Base64 string to an image file.
         
         Args:
             base64_string: Base64 encoded image string
+            digest: compute_base64_digest() of the string
             filename: Optional filename for the decoded image
             
         Returns:
             Tuple of (success, error_message, result_data)
         """
+        # Return the previous result if this payload was already saved
+        cache_key = (digest, filename)
+        cached = self.get_cached_result(digest, filename)
+        if cached is not None:
+            return True, None, cached
+        
         try:
-            # Validate the Base64 string
-            is_valid, error_message = validate_base64_string(base64_string)
-            if not is_valid:
-                return False, error_message, None
-            
-            # Decode Base64 to bytes
-            image_data = base64.b64decode(base64_string)
+            # Decode Base64 to bytes and check the image in a single pass,
+            # off the event loop thread
+            try:
+                image_data, image = await anyio.to_thread.run_sync(
+                    self._decode_image, base64_string
+                )
+            except Exception as e:
+                return False, f"Invalid Base64 string or not a valid image: {str(e)}", None
             
             # Determine file extension from image data
-            image = Image.open(io.BytesIO(image_data))
             format_extension = self._get_extension_from_format(image.format or 'PNG')
             
             # Generate filename if not provided
@@ -101,43 +175,94 @@ class ImageService:
             unique_filename = generate_unique_filename(filename, format_extension)
             
             # Save the image to the specified output directory
-            file_path = self.outputs_dir / unique_filename
+            file_path = os.path.join(self._outputs_dir_str, unique_filename)
             
-            # Save with proper format
-            image.save(file_path, format=image.format)
+            # Write the original bytes verbatim when the detected format has
+            # its own extension; only formats without one are re-encoded
+            # (as PNG). Disk writes are kept off the event loop thread.
+            if FORMAT_TO_EXTENSION.get(image.format) == format_extension:
+                async with await anyio.open_file(file_path, 'wb') as f:
+                    await f.write(image_data)
+            else:
+                await anyio.to_thread.run_sync(image.save, file_path)
             
             # Prepare response data
             result_data = {
                 "message": "Image successfully decoded and saved",
-                "file_path": str(file_path),
+                "file_path": file_path,
                 "filename": unique_filename
             }
             
+            with self._decode_cache_lock:
+                self._decode_cache[cache_key] = result_data
+                self._decode_cache.move_to_end(cache_key)
+                while len(self._decode_cache) > DECODE_CACHE_MAX_ENTRIES:
+                    self._decode_cache.popitem(last=False)
+            
             return True, None, result_data
             
         except Exception as e:
             return False, f"Error decoding Base64 to image: {str(e)}", None
     
-    def _get_extension_from_format(self, format_name: str) -> str:
+    def get_cached_result(self, digest: str, filename: Optional[str] = None) -> Optional[dict]:
+        """
+        Look up a previous decode result whose output file still exists.
+        
+        Entries whose file has been removed are dropped from the cache.
+        
+        Args:
+            digest: compute_base64_digest() of the Base64 string
+            filename: Filename the payload was decoded with
+            
+        Returns:
+            Copy of the cached result_data, or None if there is none
+        """
+        cache_key = (digest, filename)
+        with self._decode_cache_lock:
+            cached = self._decode_cache.get(cache_key)
+            if cached is None:
+                return None
+            if not os.path.exists(cached["file_path"]):
+                del self._decode_cache[cache_key]
+                return None
+            self._decode_cache.move_to_end(cache_key)
+            return dict(cached)
+    
+    @staticmethod
+    def _decode_image(base64_string: str) -> Tuple[bytes, Image.Image]:
+        """
+        Decode a Base64 string and open the result as an image.
+        
+        The pixel data is loaded once to check the image is complete;
+        Image.open alone only reads the header, and Image.verify() does
+        not detect truncated JPEG, GIF, BMP or TIFF data.
+        
+        Args:
+            base64_string: Base64 encoded image string
+            
+        Returns:
+            Tuple of (image_data, image)
+            
+        Raises:
+            Exception: If the string is not valid Base64 or not a complete image
+        """
+        image_data = base64.b64decode(base64_string, validate=False)
+        image = Image.open(io.BytesIO(image_data))
+        image.load()
+        return image_data, image
+    
+    @staticmethod
+    def _get_extension_from_format(format_name: str) -> str:
         """
         Get file extension from PIL image format.
         
         Args:
-            format_name: PIL image format name
+            format_name: PIL image format name (PIL reports these uppercase)
             
         Returns:
             File extension with dot
         """
-        format_to_extension = {
-            'JPEG': '.jpg',
-            'PNG': '.png',
-            'GIF': '.gif',
-            'BMP': '.bmp',
-            'TIFF': '.tiff',
-            'WEBP': '.webp'
-        }
-        
-        return format_to_extension.get(format_name.upper(), '.png')
+        return FORMAT_TO_EXTENSION.get(format_name, '.png')
     
     def cleanup_old_files(self, max_age_hours: int = 24) -> None:
         """
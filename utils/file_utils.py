@@ -2,19 +2,47 @@
 Utility functions for file operations and validation.
 """
 import os
-import base64
-import uuid
+import hashlib
+import itertools
+import secrets
 from pathlib import Path
 from typing import Tuple, Optional
 from PIL import Image
 import io
 
 
-def create_directories() -> None:
-    """Create necessary directories if they don't exist."""
-    directories = ["uploads", "outputs"]
-    for directory in directories:
-        Path(directory).mkdir(exist_ok=True)
+# File extensions accepted for upload
+ALLOWED_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'})
+
+# Leading "magic" bytes of the supported image formats
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+    (b'BM', 'BMP'),
+    (b'II*\x00', 'TIFF'),
+    (b'MM\x00*', 'TIFF'),
+)
+
+
+# Translation table replacing characters that are unsafe in filenames
+_SANITIZE_TABLE = str.maketrans({char: '_' for char in '<>:"|?*\\/'})
+
+
+# Per-process prefix and counter used to build unique filenames
+_filename_nonce = secrets.token_hex(4)
+_filename_counter = itertools.count()
+
+
+def _reset_filename_nonce() -> None:
+    """Give forked worker processes their own filename prefix."""
+    global _filename_nonce, _filename_counter
+    _filename_nonce = secrets.token_hex(4)
+    _filename_counter = itertools.count()
+
+
+os.register_at_fork(after_in_child=_reset_filename_nonce)
 
 
 def validate_image_file(file_content: bytes, filename: str) -> Tuple[bool, Optional[str]]:
@@ -29,42 +57,60 @@ def validate_image_file(file_content: bytes, filename: str) -> Tuple[bool, Optio
         Tuple of (is_valid, error_message)
     """
     # Check file extension
-    allowed_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff'}
-    file_extension = Path(filename).suffix.lower()
+    dot, _, extension = filename.rpartition('.')
+    file_extension = f".{extension.lower()}" if dot else ''
     
-    if file_extension not in allowed_extensions:
-        return False, f"Unsupported file format. Allowed formats: {', '.join(allowed_extensions)}"
+    if file_extension not in ALLOWED_EXTENSIONS:
+        return False, f"Unsupported file format. Allowed formats: {', '.join(ALLOWED_EXTENSIONS)}"
     
-    # Check if file is actually an image
+    # Check that the file content is an image of the claimed format
     try:
-        image = Image.open(io.BytesIO(file_content))
-        image.verify()  # Verify it's actually an image
-        return True, None
+        image_format = detect_image_format(file_content)
     except Exception as e:
         return False, f"Invalid image file: {str(e)}"
+    
+    if Image.registered_extensions().get(file_extension) != image_format:
+        return False, f"Invalid image file: {image_format} content does not match extension {file_extension}"
+    
+    return True, None
 
 
-def validate_base64_string(base64_string: str) -> Tuple[bool, Optional[str]]:
+def detect_image_format(data: bytes) -> str:
     """
-    Validate if the provided string is a valid Base64 encoded image.
+    Detect the PIL format name of an image from its header.
+    
+    Known signatures are matched directly; anything else is identified
+    by letting PIL read the header, without decoding the pixel data.
     
     Args:
-        base64_string: Base64 encoded string
+        data: Raw image content
         
     Returns:
-        Tuple of (is_valid, error_message)
-    """
-    try:
-        # Check if it's valid base64
-        decoded_data = base64.b64decode(base64_string)
+        PIL image format name (e.g. 'PNG', 'JPEG')
         
-        # Try to open as image
-        image = Image.open(io.BytesIO(decoded_data))
-        image.verify()
+    Raises:
+        Exception: If the data is not a recognizable image
+    """
+    for signature, image_format in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return image_format
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'WEBP'
+    
+    return Image.open(io.BytesIO(data)).format
+
+
+def compute_base64_digest(base64_string: str) -> str:
+    """
+    Compute a short content hash of a Base64 string.
+    
+    Args:
+        base64_string: Base64 encoded string
         
-        return True, None
-    except Exception as e:
-        return False, f"Invalid Base64 string or not a valid image: {str(e)}"
+    Returns:
+        Hex digest (32 characters) of the string's BLAKE2b hash
+    """
+    return hashlib.blake2b(base64_string.encode(), digest_size=16).hexdigest()
 
 
 def generate_unique_filename(original_filename: str, extension: str = None) -> str:
@@ -85,7 +131,7 @@ def generate_unique_filename(original_filename: str, extension: str = None) -> s
     name_without_ext = Path(original_filename).stem
     
     # Generate unique identifier
-    unique_id = str(uuid.uuid4())[:8]
+    unique_id = f"{_filename_nonce}{next(_filename_counter):x}"
     
     return f"{name_without_ext}_{unique_id}{extension}"
 
@@ -113,12 +159,8 @@ def sanitize_filename(filename: str) -> str:
     Returns:
         Sanitized filename
     """
-    # Remove or replace dangerous characters
-    dangerous_chars = ['<', '>', ':', '"', '|', '?', '*', '\\', '/']
-    sanitized = filename
-    
-    for char in dangerous_chars:
-        sanitized = sanitized.replace(char, '_')
+    # Replace dangerous characters in a single pass
+    sanitized = filename.translate(_SANITIZE_TABLE)
     
     # Limit length
     if len(sanitized) > 100: